@@ -3,177 +3,597 @@ Monitor de Empleo Santa Fe - Versión Cloud
 Envía notificaciones por Telegram (más confiable que email en servicios gratuitos)
 """
 
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+import codecs
+import httpx
+from lxml import etree
 import json
 import os
+import sqlite3
 from datetime import datetime
+from functools import lru_cache
+from urllib.parse import urljoin
 import hashlib
+import pickle
+import re
+import unicodedata
+from types import MappingProxyType
+
+try:
+    import orjson
+except ImportError:  # se usa el módulo json estándar
+    orjson = None
+
+try:
+    from datasketch import MinHash, MinHashLSH
+except ImportError:  # sin detección de casi-duplicados
+    MinHash = MinHashLSH = None
+
+# Constantes de scraping, construidas una sola vez por proceso
+HEADERS = MappingProxyType({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+})
+CLASES_TITULO = ('titulo',)
+CLASES_EMPRESA = ('empresa', 'company', 'empleador', 'organismo')
+CLASES_UBICACION = ('ubicacion', 'location', 'localidad', 'lugar')
+
+# Declaración de codificación en el HTML (<meta charset=...> o http-equiv)
+META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+
+# Abreviaturas frecuentes en títulos, para que "Analista Sr." y "Analista Senior"
+# tengan las mismas palabras al compararlos
+ABREVIATURAS = MappingProxyType({
+    'sr': 'senior', 'sra': 'senior', 'ssr': 'semisenior', 'jr': 'junior',
+    'aux': 'auxiliar', 'adm': 'administrativo', 'admin': 'administrativo',
+    'tec': 'tecnico', 'ing': 'ingeniero', 'lic': 'licenciado', 'prof': 'profesor',
+})
+
+
+def xpath_clases(clases):
+    """Condición XPath: el elemento tiene alguna de las clases CSS indicadas"""
+    return " or ".join(
+        f"contains(concat(' ', normalize-space(@class), ' '), ' {clase} ')"
+        for clase in clases
+    )
+
 
 class MonitorEmpleoCloud:
+    # Contenedores de ofertas (tag, clase), en orden de preferencia
+    CONTENEDORES_OFERTAS = (
+        ('div', 'oferta'),
+        ('div', 'job-item'),
+        ('article', None),
+        ('div', 'card'),
+        ('li', 'list-item'),
+    )
+    TAGS_CONTENEDORES = tuple(dict.fromkeys(tag for tag, _ in CONTENEDORES_OFERTAS))
+    
+    # Campos de cada oferta, compilados una sola vez. Las uniones XPath devuelven
+    # los nodos en orden de documento, así que [1] es la primera coincidencia.
+    # El título se busca por prioridad: encabezados, luego a.titulo, luego strong
+    # (así un "¡Nuevo!" en <strong> antes del <h3> no reemplaza al título)
+    XPATHS_TITULO = (
+        etree.XPath("(.//h2 | .//h3 | .//h4 | .//h5)[1]"),
+        etree.XPath(f"(.//a[{xpath_clases(CLASES_TITULO)}])[1]"),
+        etree.XPath("(.//strong)[1]"),
+    )
+    XPATH_EMPRESA = etree.XPath(f"(.//*[{xpath_clases(CLASES_EMPRESA)}])[1]")
+    XPATH_UBICACION = etree.XPath(f"(.//*[{xpath_clases(CLASES_UBICACION)}])[1]")
+    XPATH_ENLACE = etree.XPath("(.//a[@href])[1]/@href")
+    
+    # Plantillas de la notificación de Telegram (Markdown)
+    PLANTILLA_ENCABEZADO = (
+        "🔔 *Nuevas Ofertas de Empleo - Santa Fe*\n"
+        "Se detectaron {total} nueva(s) oferta(s)\n\n"
+    )
+    PLANTILLA_OFERTA = (
+        "{i}. *{titulo}*\n"
+        "   📍 {ubicacion}\n"
+        "   🏢 {empresa}\n"
+        "   🔗 [Ver oferta]({enlace})\n\n"
+    )
+    
     def __init__(self):
         self.url_base = "https://www.santafe.gob.ar/simtyss/portalempleo/"
         self.url_busqueda = "https://www.santafe.gob.ar/simtyss/portalempleo/?busqueda_detallada_puesto_pe/"
-        self.archivo_estado = "empleos_anteriores.json"
+        # Resuelve enlaces absolutos, relativos a la raíz y relativos al portal
+        self._unir_url = lru_cache(maxsize=1024)(
+            lambda href: urljoin(self.url_base, href) if href else self.url_base
+        )
+        # Páginas de resultados a consultar (se descargan en paralelo)
+        self.urls_busqueda = [self.url_busqueda]
+        self.max_conexiones = 20
+        self.archivo_estado = "empleos.db"
+        self.archivo_estado_json = "empleos_anteriores.json"  # formato anterior
+        self.archivo_meta = "meta.json"
+        self.archivo_lsh = "lsh_ofertas.pkl"
+        
+        # Detección de casi-duplicados (p. ej. "Analista Sr." / "Analista Senior")
+        self.umbral_similitud = 0.85
+        self.num_permutaciones = 64
         
         # Variables de entorno para configuración
         self.telegram_bot_token = os.environ.get('TELEGRAM_BOT_TOKEN', '')
         self.telegram_chat_id = os.environ.get('TELEGRAM_CHAT_ID', '')
         self.email_destinatario = os.environ.get('EMAIL_DESTINATARIO', '')
         
-        self.empleos_anteriores = self.cargar_estado()
+        self.conexion = self.cargar_estado()
+        self.total_conocidas = self.conexion.execute("SELECT COUNT(*) FROM ofertas").fetchone()[0]
+        self.meta = self.cargar_meta()
+        self.cache_pendiente = {}
+        self.lsh = self.cargar_lsh()
+        
+        # Cliente HTTP/2 compartido: una sola conexión por host para portal y Telegram
+        self.session = httpx.AsyncClient(
+            http2=True,
+            headers=HEADERS,
+            timeout=30
+        )
     
     def cargar_estado(self):
-        """Carga el estado anterior de empleos monitoreados"""
+        """Abre la base de estado, creándola (y migrando el JSON anterior) si hace falta"""
+        conexion = sqlite3.connect(self.archivo_estado)
+        conexion.execute(
+            "CREATE TABLE IF NOT EXISTS ofertas ("
+            "hash TEXT PRIMARY KEY, titulo TEXT, empresa TEXT, ubicacion TEXT, "
+            "enlace TEXT, fecha_deteccion TEXT)"
+        )
+        
+        vacia = conexion.execute("SELECT COUNT(*) FROM ofertas").fetchone()[0] == 0
+        if vacia and os.path.exists(self.archivo_estado_json):
+            try:
+                empleos = self.migrar_hashes(self.leer_json(self.archivo_estado_json))
+                with conexion:
+                    conexion.executemany(
+                        "INSERT OR IGNORE INTO ofertas VALUES (?, ?, ?, ?, ?, ?)",
+                        [self.fila_oferta(emp) for emp in empleos]
+                    )
+                print(f"Estado migrado desde {self.archivo_estado_json}: {len(empleos)} ofertas")
+            except Exception as e:
+                print(f"Error al migrar estado: {e}")
+        
+        return conexion
+    
+    def migrar_hashes(self, empleos):
+        """Recalcula los hashes de estados guardados con la versión anterior (MD5)"""
+        for emp in empleos:
+            if len(emp.get('hash', '')) != 16:
+                emp['hash'] = self.calcular_hash(emp['titulo'], emp['empresa'])
+        return empleos
+    
+    def fila_oferta(self, oferta):
+        """Convierte una oferta en una fila de la tabla de estado"""
+        return (
+            oferta['hash'],
+            oferta.get('titulo'),
+            oferta.get('empresa'),
+            oferta.get('ubicacion'),
+            oferta.get('enlace'),
+            oferta.get('fecha_deteccion')
+        )
+    
+    def leer_json(self, ruta):
+        """Lee un archivo JSON (con orjson si está disponible)"""
+        with open(ruta, 'rb') as f:
+            contenido = f.read()
+        return orjson.loads(contenido) if orjson else json.loads(contenido)
+    
+    def escribir_json(self, ruta, datos):
+        """Escribe un archivo JSON (con orjson si está disponible)"""
+        if orjson:
+            with open(ruta, 'wb') as f:
+                f.write(orjson.dumps(datos, option=orjson.OPT_INDENT_2))
+        else:
+            with open(ruta, 'w', encoding='utf-8') as f:
+                json.dump(datos, f, indent=2, ensure_ascii=False)
+    
+    def cargar_meta(self):
+        """Carga los metadatos de la última ejecución (cabeceras de caché HTTP y
+        contenedor de ofertas que funcionó en cada página)"""
         try:
-            if os.path.exists(self.archivo_estado):
-                with open(self.archivo_estado, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+            if os.path.exists(self.archivo_meta):
+                meta = self.leer_json(self.archivo_meta)
+                meta.setdefault('cache_http', {})
+                meta.setdefault('contenedores', {})
+                return meta
         except Exception as e:
-            print(f"Error al cargar estado: {e}")
-        return []
+            print(f"Error al cargar metadatos: {e}")
+        return {'cache_http': {}, 'contenedores': {}}
     
-    def guardar_estado(self, empleos):
-        """Guarda el estado actual de empleos"""
+    def guardar_meta(self):
+        """Guarda los metadatos de la ejecución actual"""
         try:
-            with open(self.archivo_estado, 'w', encoding='utf-8') as f:
-                json.dump(empleos, f, indent=2, ensure_ascii=False)
-            print(f"Estado guardado: {len(empleos)} ofertas")
+            self.meta['cache_http'].update(self.cache_pendiente)
+            self.escribir_json(self.archivo_meta, self.meta)
         except Exception as e:
-            print(f"Error al guardar estado: {e}")
+            print(f"Error al guardar metadatos: {e}")
     
-    def obtener_ofertas(self):
-        """Obtiene las ofertas de empleo del portal"""
-        ofertas = []
+    def cargar_lsh(self):
+        """Carga el índice LSH de ofertas conocidas, construyéndolo desde la base si no existe"""
+        if MinHashLSH is None:
+            return None
         
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            
-            print(f"Consultando: {self.url_busqueda}")
-            response = requests.get(self.url_busqueda, headers=headers, timeout=30)
+            if os.path.exists(self.archivo_lsh):
+                with open(self.archivo_lsh, 'rb') as f:
+                    return pickle.load(f)
+        except Exception as e:
+            print(f"Error al cargar índice LSH: {e}")
+        
+        lsh = MinHashLSH(threshold=self.umbral_similitud, num_perm=self.num_permutaciones)
+        for hash_oferta, titulo in self.conexion.execute("SELECT hash, titulo FROM ofertas"):
+            palabras = self.palabras_titulo(titulo or '')
+            if palabras:
+                lsh.insert(hash_oferta, self.calcular_minhash(palabras))
+        return lsh
+    
+    def guardar_lsh(self):
+        """Guarda el índice LSH para la próxima ejecución"""
+        if self.lsh is None:
+            return
+        try:
+            with open(self.archivo_lsh, 'wb') as f:
+                pickle.dump(self.lsh, f)
+        except Exception as e:
+            print(f"Error al guardar índice LSH: {e}")
+    
+    def guardar_estado(self):
+        """Confirma las ofertas registradas en esta ejecución y cierra la base"""
+        try:
+            self.conexion.commit()
+            total = self.conexion.execute("SELECT COUNT(*) FROM ofertas").fetchone()[0]
+            print(f"Estado guardado: {total} ofertas")
+            # Las cabeceras de caché solo se guardan si el estado se confirmó;
+            # si no, un 304 en la próxima ejecución ocultaría ofertas nuevas.
+            self.guardar_meta()
+            self.guardar_lsh()
+        except Exception as e:
+            print(f"Error al guardar estado: {e}")
+        finally:
+            self.conexion.close()
+    
+    async def _fetch(self, url, semaforo):
+        """Descarga una página de resultados respetando el límite de conexiones
+        concurrentes y la parsea a medida que llegan los datos.
+        Devuelve None si el servidor responde 304 (sin cambios)."""
+        cache = self.meta['cache_http'].get(url, {})
+        headers = {}
+        if cache.get('etag'):
+            headers['If-None-Match'] = cache['etag']
+        if cache.get('last_modified'):
+            headers['If-Modified-Since'] = cache['last_modified']
+        
+        todas = tuple(range(len(self.CONTENEDORES_OFERTAS)))
+        nombres = [self.nombre_contenedor(c) for c in self.CONTENEDORES_OFERTAS]
+        ganador = self.meta['contenedores'].get(url)
+        # Si se conoce el contenedor que funcionó la vez anterior, buscar solo ese
+        categorias = (nombres.index(ganador),) if ganador in nombres else todas
+        
+        async with semaforo:
+            print(f"Consultando: {url}")
+            resultado = await self.descargar_y_parsear(url, headers, categorias)
+        
+        if resultado is None:
+            print(f"Sin cambios desde la última consulta: {url}")
+            return None
+        candidatos, vistas = resultado
+        
+        # El contenedor recordado no aparece pero hay otros: la estructura cambió.
+        # Se descarga la página una sola vez más buscando entre todos
+        if categorias != todas and not candidatos[categorias[0]] and vistas - set(categorias):
+            print(f"El contenedor '{ganador}' ya no encuentra ofertas; buscando entre todos")
+            categorias = todas
+            async with semaforo:
+                resultado = await self.descargar_y_parsear(url, {}, categorias)
+            if resultado is None:
+                return None
+            candidatos, vistas = resultado
+        
+        # Usar el primer tipo de contenedor que tenga ofertas y recordarlo
+        categoria = next((c for c in categorias if candidatos[c]), None)
+        campos = []
+        if categoria is not None:
+            self.meta['contenedores'][url] = nombres[categoria]
+            campos = candidatos[categoria]
+        print(f"Elementos encontrados: {len(campos)}")
+        return campos
+    
+    async def descargar_y_parsear(self, url, headers, categorias):
+        """Descarga la página en streaming y extrae los campos de los contenedores
+        de las categorías indicadas. Devuelve (candidatos, categorías vistas en la
+        página) o None si la respuesta es 304."""
+        async with self.session.stream('GET', url, headers=headers) as response:
+            if response.status_code == 304:
+                return None
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Intentar múltiples selectores para encontrar ofertas
-            elementos_ofertas = (
-                soup.find_all('div', class_='oferta') or
-                soup.find_all('div', class_='job-item') or
-                soup.find_all('article') or
-                soup.find_all('div', class_='card') or
-                soup.find_all('li', class_='list-item')
-            )
-            
-            print(f"Elementos encontrados: {len(elementos_ofertas)}")
+            # El parser se crea con el primer fragmento para poder detectar la
+            # codificación cuando Content-Type no la indica
+            parser = None
+            candidatos = {categoria: [] for categoria in categorias}
+            vistas = set()
+            async for chunk in response.aiter_bytes(8192):
+                if parser is None:
+                    parser = self.crear_parser(response.charset_encoding, chunk)
+                parser.feed(chunk)
+                self.procesar_eventos(parser, candidatos, vistas)
+            if parser is not None:  # cuerpo vacío: no hay nada que cerrar
+                parser.close()
+                self.procesar_eventos(parser, candidatos, vistas)
             
-            for elemento in elementos_ofertas:
-                try:
-                    # Buscar título
-                    titulo = (
-                        elemento.find(['h2', 'h3', 'h4', 'h5']) or
-                        elemento.find('a', class_='titulo') or
-                        elemento.find('strong')
-                    )
-                    
-                    # Buscar empresa
-                    empresa = elemento.find(
-                        class_=['empresa', 'company', 'empleador', 'organismo']
-                    )
-                    
-                    # Buscar ubicación
-                    ubicacion = elemento.find(
-                        class_=['ubicacion', 'location', 'localidad', 'lugar']
-                    )
-                    
-                    # Buscar enlace
-                    enlace = elemento.find('a', href=True)
-                    
-                    if titulo:  # Solo agregar si tiene al menos título
-                        titulo_texto = titulo.get_text(strip=True)
-                        empresa_texto = empresa.get_text(strip=True) if empresa else 'Gobierno de Santa Fe'
-                        
-                        oferta = {
-                            'titulo': titulo_texto,
-                            'empresa': empresa_texto,
-                            'ubicacion': ubicacion.get_text(strip=True) if ubicacion else 'Santa Fe',
-                            'enlace': self.construir_enlace(enlace),
-                            'fecha_deteccion': datetime.now().isoformat(),
-                            'hash': self.calcular_hash(titulo_texto, empresa_texto)
-                        }
-                        
-                        ofertas.append(oferta)
-                        
-                except Exception as e:
-                    print(f"Error procesando elemento: {e}")
-                    continue
+            self.cache_pendiente[url] = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified')
+            }
+        return candidatos, vistas
+    
+    def crear_parser(self, codificacion, primer_chunk):
+        """Crea el parser incremental. Sin charset en Content-Type se usa el
+        <meta charset> del comienzo de la página y, si tampoco está, UTF-8
+        (lxml asumiría latin-1 y alteraría títulos y hashes)."""
+        if not codificacion:
+            declarada = META_CHARSET.search(primer_chunk)
+            codificacion = declarada.group(1).decode('ascii') if declarada else 'utf-8'
+        try:
+            codecs.lookup(codificacion)
+        except LookupError:
+            codificacion = 'utf-8'
+        return etree.HTMLPullParser(
+            events=('end',), tag=self.TAGS_CONTENEDORES, encoding=codificacion
+        )
+    
+    async def obtener_ofertas(self):
+        """Obtiene las ofertas de empleo del portal.
+        Devuelve None si ninguna página cambió desde la última verificación."""
+        ofertas = []
+        # Todas las ofertas de una ejecución comparten la fecha de detección
+        fecha_deteccion = datetime.now().isoformat()
+        
+        semaforo = asyncio.Semaphore(self.max_conexiones)
+        tareas = [self._fetch(url, semaforo) for url in self.urls_busqueda]
+        resultados = await asyncio.gather(*tareas, return_exceptions=True)
+        
+        if all(resultado is None for resultado in resultados):
+            return None
+        
+        for resultado in resultados:
+            try:
+                if isinstance(resultado, Exception):
+                    raise resultado
+                # Las páginas sin cambios no aportan ofertas nuevas
+                if resultado is not None:
+                    ofertas.extend(self.armar_ofertas(resultado, fecha_deteccion))
+            except httpx.HTTPError as e:
+                print(f"Error en la petición HTTP: {e}")
+            except Exception as e:
+                print(f"Error inesperado: {e}")
+        
+        print(f"Ofertas procesadas: {len(ofertas)}")
+        return ofertas
+    
+    def nombre_contenedor(self, contenedor):
+        """Nombre legible de un contenedor (tag, clase), p. ej. 'div.oferta'"""
+        tag, clase = contenedor
+        return f"{tag}.{clase}" if clase else tag
+    
+    def categoria_contenedor(self, elemento, categorias):
+        """Devuelve la primera de las categorías (índices en CONTENEDORES_OFERTAS)
+        a la que pertenece el elemento, o None"""
+        clases = elemento.get('class', '').split()
+        for i in categorias:
+            tag, clase = self.CONTENEDORES_OFERTAS[i]
+            if elemento.tag == tag and (clase is None or clase in clases):
+                return i
+        return None
+    
+    def procesar_eventos(self, parser, candidatos, vistas):
+        """Extrae los campos de cada contenedor de oferta ya cerrado por el parser.
+        Solo se extraen las categorías de candidatos, pero todas se registran en
+        vistas (es una comparación de tag y clase, sin costo de extracción)."""
+        todas = range(len(self.CONTENEDORES_OFERTAS))
+        for _, elemento in parser.read_events():
+            vista = self.categoria_contenedor(elemento, todas)
+            if vista is not None:
+                vistas.add(vista)
             
-            print(f"Ofertas procesadas: {len(ofertas)}")
+            categoria = self.categoria_contenedor(elemento, candidatos)
+            if categoria is not None:
+                candidatos[categoria].append(self.extraer_campos(elemento))
             
-        except requests.exceptions.RequestException as e:
-            print(f"Error en la petición HTTP: {e}")
-        except Exception as e:
-            print(f"Error inesperado: {e}")
+            # Si ningún contenedor lo incluye, el subárbol ya no se necesita:
+            # liberarlo mantiene acotada la memoria durante la descarga
+            if all(self.categoria_contenedor(a, candidatos) is None
+                   for a in elemento.iterancestors()):
+                elemento.clear(keep_tail=True)
+    
+    def extraer_campos(self, elemento):
+        """Devuelve (título, empresa, ubicación, href) de un contenedor de oferta"""
+        titulo = next(
+            (nodos[0] for nodos in (xpath(elemento) for xpath in self.XPATHS_TITULO) if nodos),
+            None
+        )
+        empresa, ubicacion = [
+            self.texto(nodos[0]) if nodos else None
+            for nodos in (self.XPATH_EMPRESA(elemento), self.XPATH_UBICACION(elemento))
+        ]
+        enlace = self.XPATH_ENLACE(elemento)
+        return (
+            self.texto(titulo) if titulo is not None else None,
+            empresa,
+            ubicacion,
+            enlace[0] if enlace else None
+        )
+    
+    def texto(self, elemento):
+        """Texto del elemento con cada fragmento recortado (como get_text(strip=True))"""
+        return ''.join(t.strip() for t in elemento.itertext())
+    
+    def armar_ofertas(self, campos, fecha_deteccion):
+        """Convierte los campos extraídos de una página en ofertas"""
+        ofertas = []
+        for titulo_texto, empresa_texto, ubicacion_texto, href in campos:
+            if titulo_texto:  # Solo agregar si tiene al menos título
+                empresa_texto = empresa_texto or 'Gobierno de Santa Fe'
+                
+                oferta = {
+                    'titulo': titulo_texto,
+                    'empresa': empresa_texto,
+                    'ubicacion': ubicacion_texto or 'Santa Fe',
+                    'enlace': self.construir_enlace(href),
+                    'fecha_deteccion': fecha_deteccion,
+                    'hash': self.calcular_hash(titulo_texto, empresa_texto)
+                }
+                
+                ofertas.append(oferta)
         
         return ofertas
     
-    def construir_enlace(self, elemento_enlace):
+    def construir_enlace(self, href):
         """Construye la URL completa del enlace"""
-        if not elemento_enlace:
-            return self.url_base
-        
-        href = elemento_enlace.get('href', '')
-        if href.startswith('http'):
-            return href
-        elif href.startswith('/'):
-            return f"https://www.santafe.gob.ar{href}"
-        else:
-            return f"{self.url_base}{href}"
+        return self._unir_url(href or '')
     
     def calcular_hash(self, titulo, empresa):
         """Calcula un hash único para una oferta"""
         texto = f"{titulo}{empresa}".lower().strip()
-        return hashlib.md5(texto.encode()).hexdigest()
+        return hashlib.sha256(texto.encode()).hexdigest()[:16]
+    
+    def palabras_titulo(self, titulo):
+        """Palabras normalizadas de un título: sin acentos, en minúsculas y con las
+        abreviaturas expandidas"""
+        texto = unicodedata.normalize('NFKD', titulo.lower())
+        texto = ''.join(c for c in texto if not unicodedata.combining(c))
+        return {ABREVIATURAS.get(palabra, palabra) for palabra in re.findall(r'\w+', texto)}
+    
+    def calcular_minhash(self, palabras):
+        """Calcula el MinHash de las palabras de un título"""
+        minhash = MinHash(num_perm=self.num_permutaciones)
+        for palabra in palabras:
+            minhash.update(palabra.encode())
+        return minhash
     
     def detectar_nuevas_ofertas(self, ofertas_actuales):
         """Detecta ofertas nuevas comparando con el estado anterior"""
-        hashes_anteriores = {emp['hash'] for emp in self.empleos_anteriores}
-        nuevas = [o for o in ofertas_actuales if o['hash'] not in hashes_anteriores]
+        # Indexar por hash descarta además las ofertas repetidas en la página
+        actuales = {oferta['hash']: oferta for oferta in ofertas_actuales}
+        
+        # La diferencia de conjuntos se resuelve en SQLite con un EXCEPT sobre una
+        # tabla temporal. La transacción queda abierta hasta guardar_estado().
+        self.conexion.execute("CREATE TEMP TABLE IF NOT EXISTS actuales (hash TEXT PRIMARY KEY)")
+        self.conexion.execute("DELETE FROM actuales")
+        self.conexion.executemany("INSERT INTO actuales VALUES (?)", ((h,) for h in actuales))
+        nuevos_hashes = {
+            h for (h,) in self.conexion.execute(
+                "SELECT hash FROM actuales EXCEPT SELECT hash FROM ofertas"
+            )
+        }
+        
+        nuevas = [oferta for h, oferta in actuales.items() if h in nuevos_hashes]
+        if self.lsh is not None:
+            nuevas = self.descartar_casi_duplicados(nuevas)
+        
+        # Los casi-duplicados no se registran como vistos: se vuelven a evaluar en
+        # cada ejecución, así un descarte erróneo no queda oculto para siempre
+        self.conexion.executemany(
+            "INSERT INTO ofertas VALUES (?, ?, ?, ?, ?, ?)",
+            [self.fila_oferta(oferta) for oferta in nuevas]
+        )
+        
         print(f"Nuevas ofertas detectadas: {len(nuevas)}")
         return nuevas
     
-    def enviar_telegram(self, nuevas_ofertas):
+    def descartar_casi_duplicados(self, nuevas):
+        """Descarta las ofertas cuyo título es casi igual al de una oferta ya conocida
+        de la misma empresa (republicaciones con pequeños cambios en el título).
+        Solo se compara contra ejecuciones anteriores, no entre ofertas de esta."""
+        distintas = []
+        firmas = []
+        for oferta in nuevas:
+            palabras = self.palabras_titulo(oferta['titulo'])
+            minhash = self.calcular_minhash(palabras) if palabras else None
+            similar = self.buscar_similar(oferta, palabras, minhash) if minhash else None
+            if similar:
+                print(f"Casi-duplicado descartado: '{oferta['titulo']}' ({oferta['hash']}) "
+                      f"≈ '{similar[1]}' ({similar[0]})")
+                continue
+            distintas.append(oferta)
+            if minhash:
+                firmas.append((oferta['hash'], minhash))
+        
+        # Indexar recién después de consultar todas, para que las ofertas de una
+        # misma ejecución no se descarten entre sí
+        for hash_oferta, minhash in firmas:
+            if hash_oferta not in self.lsh:
+                self.lsh.insert(hash_oferta, minhash)
+        return distintas
+    
+    def buscar_similar(self, oferta, palabras, minhash):
+        """Devuelve (hash, título) de una oferta conocida de la misma empresa y
+        ubicación cuyo título comparte al menos umbral_similitud de sus palabras
+        (Jaccard), o None. El LSH solo propone candidatos; la similitud se
+        confirma con las palabras reales. Los títulos con números distintos
+        (p. ej. el número de escuela) nunca se consideran iguales."""
+        numeros = {p for p in palabras if p.isdigit()}
+        for hash_conocido in self.lsh.query(minhash):
+            fila = self.conexion.execute(
+                "SELECT titulo, empresa, ubicacion FROM ofertas WHERE hash = ?",
+                (hash_conocido,)
+            ).fetchone()
+            if not fila or fila[1] != oferta['empresa'] or fila[2] != oferta['ubicacion']:
+                continue
+            conocidas = self.palabras_titulo(fila[0])
+            if {p for p in conocidas if p.isdigit()} != numeros:
+                continue
+            union = palabras | conocidas
+            if union and len(palabras & conocidas) / len(union) >= self.umbral_similitud:
+                return hash_conocido, fila[0]
+        return None
+    
+    def dividir_mensajes(self, nuevas_ofertas, limite=4000):
+        """Agrupa las ofertas en mensajes que no superen el límite de Telegram (4096)"""
+        partes = [self.PLANTILLA_ENCABEZADO.format(total=len(nuevas_ofertas))]
+        largo = len(partes[0])
+        
+        for i, oferta in enumerate(nuevas_ofertas, 1):
+            bloque = self.PLANTILLA_OFERTA.format(i=i, **oferta)
+            
+            if partes and largo + len(bloque) > limite:
+                yield ''.join(partes)
+                partes, largo = [], 0
+            partes.append(bloque)
+            largo += len(bloque)
+        
+        if partes:
+            yield ''.join(partes)
+    
+    async def enviar_telegram(self, nuevas_ofertas):
         """Envía notificación por Telegram"""
         if not self.telegram_bot_token or not self.telegram_chat_id:
             print("Telegram no configurado. Saltando notificación.")
             return False
         
         try:
-            mensaje = f"🔔 *Nuevas Ofertas de Empleo - Santa Fe*\n"
-            mensaje += f"Se detectaron {len(nuevas_ofertas)} nueva(s) oferta(s)\n\n"
-            
-            for i, oferta in enumerate(nuevas_ofertas[:10], 1):  # Limitar a 10
-                mensaje += f"{i}. *{oferta['titulo']}*\n"
-                mensaje += f"   📍 {oferta['ubicacion']}\n"
-                mensaje += f"   🏢 {oferta['empresa']}\n"
-                mensaje += f"   🔗 [Ver oferta]({oferta['enlace']})\n\n"
-            
-            if len(nuevas_ofertas) > 10:
-                mensaje += f"... y {len(nuevas_ofertas) - 10} ofertas más.\n"
-            
             url = f"https://api.telegram.org/bot{self.telegram_bot_token}/sendMessage"
-            payload = {
-                'chat_id': self.telegram_chat_id,
-                'text': mensaje,
-                'parse_mode': 'Markdown',
-                'disable_web_page_preview': True
-            }
+            mensaje_anterior = None
+            enviados = 0
             
-            response = requests.post(url, json=payload, timeout=10)
-            response.raise_for_status()
+            for mensaje in self.dividir_mensajes(nuevas_ofertas):
+                payload = {
+                    'chat_id': self.telegram_chat_id,
+                    'text': mensaje,
+                    'parse_mode': 'Markdown',
+                    'disable_web_page_preview': True
+                }
+                # Encadenar como respuestas para mantener el hilo en orden
+                if mensaje_anterior:
+                    payload['reply_to_message_id'] = mensaje_anterior
+                
+                response = await self.session.post(url, json=payload, timeout=10)
+                response.raise_for_status()
+                
+                mensaje_anterior = response.json()['result']['message_id']
+                enviados += 1
             
-            print("✓ Notificación Telegram enviada exitosamente")
+            print(f"✓ Notificación Telegram enviada exitosamente ({enviados} mensaje(s))")
             return True
             
         except Exception as e:
@@ -187,7 +607,7 @@ class MonitorEmpleoCloud:
         print("="*70)
         print(f"Ofertas totales en el portal: {len(ofertas_totales)}")
         print(f"Ofertas nuevas detectadas: {len(nuevas_ofertas)}")
-        print(f"Ofertas ya conocidas: {len(self.empleos_anteriores)}")
+        print(f"Ofertas ya conocidas: {self.total_conocidas}")
         
         if nuevas_ofertas:
             print("\nNUEVAS OFERTAS:")
@@ -201,33 +621,40 @@ class MonitorEmpleoCloud:
         
         print("\n" + "="*70 + "\n")
     
-    def ejecutar(self):
+    async def ejecutar(self):
         """Ejecuta una única verificación (ideal para ejecuciones programadas)"""
         print("Iniciando verificación de ofertas de empleo...")
         print(f"Fecha/Hora: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         
-        # Obtener ofertas actuales
-        ofertas_actuales = self.obtener_ofertas()
-        
-        if not ofertas_actuales:
-            print("⚠️  No se pudieron obtener ofertas. Verificar conectividad o estructura del sitio.")
-            return
-        
-        # Detectar nuevas ofertas
-        nuevas_ofertas = self.detectar_nuevas_ofertas(ofertas_actuales)
-        
-        # Generar resumen
-        self.generar_resumen(nuevas_ofertas, ofertas_actuales)
-        
-        # Enviar notificaciones si hay nuevas ofertas
-        if nuevas_ofertas:
-            self.enviar_telegram(nuevas_ofertas)
-        
-        # Guardar estado actualizado
-        self.guardar_estado(ofertas_actuales)
-        
-        print("✓ Verificación completada")
+        try:
+            # Obtener ofertas actuales
+            ofertas_actuales = await self.obtener_ofertas()
+            
+            if ofertas_actuales is None:
+                print("✓ El portal no cambió desde la última verificación")
+                return
+            
+            if not ofertas_actuales:
+                print("⚠️  No se pudieron obtener ofertas. Verificar conectividad o estructura del sitio.")
+                return
+            
+            # Detectar nuevas ofertas
+            nuevas_ofertas = self.detectar_nuevas_ofertas(ofertas_actuales)
+            
+            # Generar resumen
+            self.generar_resumen(nuevas_ofertas, ofertas_actuales)
+            
+            # Enviar notificaciones si hay nuevas ofertas
+            if nuevas_ofertas:
+                await self.enviar_telegram(nuevas_ofertas)
+            
+            # Guardar estado actualizado
+            self.guardar_estado()
+            
+            print("✓ Verificación completada")
+        finally:
+            await self.session.aclose()
 
 if __name__ == "__main__":
     monitor = MonitorEmpleoCloud()
-    monitor.ejecutar()
+    asyncio.run(monitor.ejecutar())